@@ -70,6 +70,10 @@ function show_usage() {
     echo "  --output PATH         Add an output .npy path (repeat). If omitted, files will be auto-named."
     echo "  --output-dir PATH     Host directory for auto outputs (default: ./outputs)"
     echo "  --no-gpu              Disable GPU acceleration"
+    echo "  --iterations N        Timed inference runs in a single process (default: 1)"
+    echo "  --warmup N            Untimed warm-up runs before timing (default: 0)"
+    echo "  --cache-thrash        Evict CPU caches before every timed run"
+    echo "  --delay-ms N          Sleep between timed runs (default: 0)"
     echo "  -h, --help            Show this help message"
     echo ""
     echo "Examples:"
@@ -154,6 +158,10 @@ function get_adb_cmd() {
 DEVICE_SERIAL=""
 LIST_ONLY=false
 USE_GPU=true
+ITERATIONS=1
+WARMUP_RUNS=0
+CACHE_THRASH=false
+DELAY_MS=0
 INPUT_FILES=()
 OUTPUT_FILES=()
 HOST_OUTPUT_DIR="outputs"
@@ -175,6 +183,34 @@ while [[ $# -gt 0 ]]; do
             USE_GPU=false
             shift
             ;;
+        --iterations)
+            if [ $# -lt 2 ]; then
+                echo -e "${RED}Error: --iterations requires a number${NC}"
+                exit 1
+            fi
+            ITERATIONS="$2"
+            shift 2
+            ;;
+        --warmup)
+            if [ $# -lt 2 ]; then
+                echo -e "${RED}Error: --warmup requires a number${NC}"
+                exit 1
+            fi
+            WARMUP_RUNS="$2"
+            shift 2
+            ;;
+        --cache-thrash)
+            CACHE_THRASH=true
+            shift
+            ;;
+        --delay-ms)
+            if [ $# -lt 2 ]; then
+                echo -e "${RED}Error: --delay-ms requires a number${NC}"
+                exit 1
+            fi
+            DELAY_MS="$2"
+            shift 2
+            ;;
         --input)
             if [ $# -lt 2 ]; then
                 echo -e "${RED}Error: --input requires a path${NC}"
@@ -320,6 +356,7 @@ if [ -n "$OUTPUT_PNG" ]; then
     echo -e "${GREEN}Output PNG:          ${NC} $OUTPUT_PNG"
 fi
 echo -e "${GREEN}GPU Acceleration:    ${NC} $([ "$USE_GPU" = true ] && echo "Enabled" || echo "Disabled")"
+echo -e "${GREEN}Iterations:          ${NC} $ITERATIONS (warm-up: $WARMUP_RUNS)"
 echo ""
 
 # Check if architecture matches
@@ -412,6 +449,20 @@ if [ "$USE_GPU" = false ]; then
     CMD="$CMD --no-gpu"
 fi
 
+# Only forward non-default values so older runner binaries keep working
+if [ "$ITERATIONS" != "1" ]; then
+    CMD="$CMD --iterations $ITERATIONS"
+fi
+if [ "$WARMUP_RUNS" != "0" ]; then
+    CMD="$CMD --warmup $WARMUP_RUNS"
+fi
+if [ "$DELAY_MS" != "0" ]; then
+    CMD="$CMD --delay-ms $DELAY_MS"
+fi
+if [ "$CACHE_THRASH" = true ]; then
+    CMD="$CMD --cache-thrash"
+fi
+
 # Run inference
 echo ""
 echo "Step 3: Running inference on device..."
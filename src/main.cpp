@@ -1,10 +1,14 @@
 #include <cctype>
+#include <chrono>
+#include <cstdint>
+#include <cstdlib>
 #include <cstring>
 #include <filesystem>
 #include <iomanip>
 #include <iostream>
 #include <system_error>
 #include <string>
+#include <thread>
 #include <vector>
 #include <android/log.h>
 #include "tflite_runner.h"
@@ -17,6 +21,23 @@
 
 namespace {
 
+// Larger than the last-level cache of current mobile SoCs
+constexpr size_t kCacheThrashBytes = 16 << 20;
+
+void ThrashCache(std::vector<uint8_t>& buffer) {
+    if (buffer.empty()) {
+        buffer.resize(kCacheThrashBytes);
+    }
+    // Write then read back every cache line so the interpreter arena is evicted
+    for (size_t i = 0; i < buffer.size(); i += 64) {
+        buffer[i] = static_cast<uint8_t>(buffer[i] + 1);
+    }
+    volatile uint32_t sink = 0;
+    for (size_t i = 0; i < buffer.size(); i += 64) {
+        sink = sink + buffer[i];
+    }
+}
+
 std::string JoinPath(const std::string& dir, const std::string& filename) {
     if (dir.empty() || dir == "." || dir == "./") {
         return filename;
@@ -142,6 +163,10 @@ void print_usage(const char* program_name) {
     std::cout << "  --output-dir <path>  Directory for auto-generated outputs (default: ./outputs)\n";
     std::cout << "  --output-png <path>  Override PNG path for the first output (PNG files are saved automatically)\n";
     std::cout << "  --no-gpu            Disable GPU delegate (use CPU only)\n";
+    std::cout << "  --iterations <n>    Number of timed inference runs (default: 1)\n";
+    std::cout << "  --warmup <n>        Untimed warm-up runs before timing (default: 0)\n";
+    std::cout << "  --cache-thrash      Evict CPU caches before every timed run\n";
+    std::cout << "  --delay-ms <n>      Sleep between timed runs (default: 0)\n";
     std::cout << "  --help              Show this help message\n";
     std::cout << "\nExample:\n";
     std::cout << "  " << program_name << " --model model.tflite --input input.npy --output output.npy --output-png output.png\n";
@@ -155,6 +180,10 @@ struct Config {
     std::string output_dir = "outputs";
     std::string output_png_path;
     bool use_gpu = true;
+    int iterations = 1;
+    int warmup_runs = 0;
+    bool cache_thrash = false;
+    int delay_ms = 0;
 };
 
 bool parse_arguments(int argc, char* argv[], Config& config) {
@@ -176,6 +205,14 @@ bool parse_arguments(int argc, char* argv[], Config& config) {
             config.output_png_path = argv[++i];
         } else if (arg == "--no-gpu") {
             config.use_gpu = false;
+        } else if (arg == "--iterations" && i + 1 < argc) {
+            config.iterations = std::atoi(argv[++i]);
+        } else if (arg == "--warmup" && i + 1 < argc) {
+            config.warmup_runs = std::atoi(argv[++i]);
+        } else if (arg == "--cache-thrash") {
+            config.cache_thrash = true;
+        } else if (arg == "--delay-ms" && i + 1 < argc) {
+            config.delay_ms = std::atoi(argv[++i]);
         } else {
             std::cerr << "Unknown argument: " << arg << "\n";
             return false;
@@ -191,6 +228,18 @@ bool parse_arguments(int argc, char* argv[], Config& config) {
         std::cerr << "Error: At least one --input is required\n";
         return false;
     }
+    if (config.iterations < 1) {
+        std::cerr << "Error: --iterations must be at least 1\n";
+        return false;
+    }
+    if (config.warmup_runs < 0) {
+        std::cerr << "Error: --warmup must not be negative\n";
+        return false;
+    }
+    if (config.delay_ms < 0) {
+        std::cerr << "Error: --delay-ms must not be negative\n";
+        return false;
+    }
     
     return true;
 }
@@ -225,6 +274,12 @@ int main(int argc, char* argv[]) {
         std::cout << "Output PNG: " << config.output_png_path << "\n";
     }
     std::cout << "GPU: " << (config.use_gpu ? "Enabled" : "Disabled") << "\n";
+    std::cout << "Iterations: " << config.iterations
+              << " (warm-up: " << config.warmup_runs << ")\n";
+    if (config.cache_thrash || config.delay_ms > 0) {
+        std::cout << "Cache thrash: " << (config.cache_thrash ? "Enabled" : "Disabled")
+                  << ", delay between runs: " << config.delay_ms << " ms\n";
+    }
     std::cout << "==============================\n\n";
     
     // Create TFLite runner
@@ -315,13 +370,34 @@ int main(int argc, char* argv[]) {
         }
     }
     
-    // Run inference
+    // Run inference. The model, delegate and tensors are set up once and
+    // reused, so every timed iteration measures steady-state invoke latency.
     std::cout << "\nRunning inference...\n";
     std::vector<std::vector<float>> outputs;
-    if (!runner.RunInferenceMulti(inputs_data, outputs)) {
-        std::cerr << "Inference failed\n";
-        return 1;
+    for (int i = 0; i < config.warmup_runs; ++i) {
+        if (!runner.RunInferenceMulti(inputs_data, outputs)) {
+            std::cerr << "Warm-up inference failed\n";
+            return 1;
+        }
     }
+    std::vector<uint8_t> thrash_buffer;
+    std::cout << std::fixed << std::setprecision(2);
+    for (int i = 0; i < config.iterations; ++i) {
+        if (config.delay_ms > 0) {
+            std::this_thread::sleep_for(std::chrono::milliseconds(config.delay_ms));
+        }
+        if (config.cache_thrash) {
+            ThrashCache(thrash_buffer);
+        }
+        if (!runner.RunInferenceMulti(inputs_data, outputs)) {
+            std::cerr << "Inference failed\n";
+            return 1;
+        }
+        const auto& run_timing = runner.GetTimingStats();
+        std::cout << "Inference[" << i << "]: " << run_timing.inference_ms << " ms\n";
+        std::cout << "Total[" << i << "]: " << run_timing.total_ms << " ms\n";
+    }
+    std::cout << std::defaultfloat;
     
     if (outputs.empty()) {
         std::cerr << "Model produced no outputs\n";
@@ -7,25 +7,86 @@ Usage:
 """
 
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 
 
+# Largest class id counted with a dense np.bincount; larger ids use np.unique
+MAX_BINCOUNT_CLASSES = 1 << 16
+
+
 def load_labels(labels_path):
     """Load class labels from text file"""
     with open(labels_path, 'r') as f:
         return [line.strip() for line in f.readlines()]
 
 
+def read_npy_header(path):
+    """Read shape and dtype from an NPY file header without loading the array"""
+    with open(path, 'rb') as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, _, dtype = np.lib.format.read_array_header_1_0(f)
+            return shape, dtype
+        if version == (2, 0):
+            shape, _, dtype = np.lib.format.read_array_header_2_0(f)
+            return shape, dtype
+    
+    # Version 3.0 headers are utf8 and have no public reader; a memory map
+    # parses the header without reading the data
+    array = np.load(path, mmap_mode='r')
+    return array.shape, array.dtype
+
+
+def load_interpreter(model_path):
+    """Create a TFLite interpreter with allocated tensors"""
+    # Prefer the lightweight tflite_runtime package; full TensorFlow imports far slower
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    interpreter = Interpreter(model_path=model_path)
+    interpreter.allocate_tensors()
+    return interpreter
+
+
+def detect_model_type(interpreter):
+    """Infer the model type from the TFLite graph, or return None if unsure"""
+    op_names = [op['op_name'].upper().replace('_', '') for op in interpreter._get_ops_details()]
+    if not op_names:
+        return None
+    
+    if 'TFLITEDETECTIONPOSTPROCESS' in op_names:
+        return 'detection'
+    
+    last_op = op_names[-1]
+    input_shape = interpreter.get_input_details()[0]['shape']
+    output_shape = interpreter.get_output_details()[0]['shape']
+    if last_op == 'ARGMAX':
+        return 'segmentation'
+    if len(output_shape) == 4 and len(input_shape) == 4 and \
+            tuple(output_shape[1:3]) == tuple(input_shape[1:3]):
+        # Per-pixel output at input resolution
+        return 'segmentation'
+    if last_op in ('SOFTMAX', 'LOGISTIC') and len(output_shape) == 2:
+        return 'classification'
+    
+    return None
+
+
 def analyze_classification(output, labels=None, top_k=5):
     """Analyze classification model output"""
     print("\n=== Classification Results ===")
     
-    # Flatten output if needed
-    if output.ndim > 1:
-        output = output.flatten()
+    # Flatten output if needed (view when already contiguous)
+    output = np.ravel(output)
     
-    # Get top K predictions
-    top_indices = np.argsort(output)[-top_k:][::-1]
+    # Get top K predictions: partial selection, then sort only the K winners
+    top_k = min(top_k, output.size)
+    top_indices = np.argpartition(output, -top_k)[-top_k:]
+    top_indices = top_indices[np.argsort(output[top_indices])[::-1]]
     
     print(f"\nTop {top_k} predictions:")
     for i, idx in enumerate(top_indices, 1):
@@ -65,13 +126,36 @@ def analyze_segmentation(output):
         
         # Get dominant class per pixel
         segmentation_map = np.argmax(output[0], axis=-1)
-        unique_classes = np.unique(segmentation_map)
-        print(f"\nClasses present in image: {unique_classes.tolist()}")
+    elif output.ndim == 3:
+        # Class-id map, e.g. from a model ending in ARG_MAX (saved as float by the runner)
+        batch, height, width = output.shape
+        print(f"Batch size: {batch}")
+        print(f"Segmentation map size: {height}x{width}")
         
-        for cls in unique_classes:
-            pixel_count = np.sum(segmentation_map == cls)
-            percentage = (pixel_count / (height * width)) * 100
-            print(f"  Class {cls}: {pixel_count} pixels ({percentage:.2f}%)")
+        class_map = np.asarray(output[0])
+        if not (np.all(np.isfinite(class_map)) and np.array_equal(class_map, np.round(class_map))):
+            print("\nNote: output is not an integer class-id map; skipping class statistics")
+            return
+        segmentation_map = class_map.astype(np.int64)
+        classes = 0
+    else:
+        return
+    
+    flat_map = segmentation_map.ravel()
+    if flat_map.min() >= 0 and flat_map.max() < MAX_BINCOUNT_CLASSES:
+        # Count pixels for every class in a single pass over the map
+        counts = np.bincount(flat_map, minlength=classes)
+        present_classes = np.flatnonzero(counts)
+        present_counts = counts[present_classes]
+    else:
+        # Negative ids (e.g. -1 ignore labels) or very large ids: count only the values present
+        present_classes, present_counts = np.unique(flat_map, return_counts=True)
+    print(f"\nClasses present in image: {present_classes.tolist()}")
+    
+    total_pixels = segmentation_map.size
+    for cls, pixel_count in zip(present_classes, present_counts):
+        percentage = (pixel_count / total_pixels) * 100
+        print(f"  Class {cls}: {pixel_count} pixels ({percentage:.2f}%)")
 
 
 def main():
@@ -85,16 +169,32 @@ def main():
     parser.add_argument('--top-k', '-k', type=int, default=5,
                        help='Number of top predictions to show (classification)')
     parser.add_argument('--model', '-m', help='Path to TFLite model (for inspection)')
+    parser.add_argument('--header-only', action='store_true',
+                       help='Only print shape and data type read from the NPY header')
     
     args = parser.parse_args()
     
-    # Load output
+    # Shape and dtype come from the header alone
     print(f"Loading output: {args.output}")
-    output = np.load(args.output)
+    shape, dtype = read_npy_header(args.output)
     
     print(f"\n=== Output Information ===")
-    print(f"Shape: {output.shape}")
-    print(f"Data type: {output.dtype}")
+    print(f"Shape: {shape}")
+    print(f"Data type: {dtype}")
+    if args.header_only:
+        return
+    
+    # Load the model in the background (after the header read, so a bad output
+    # path fails fast). The import itself holds the GIL, but the NumPy
+    # reductions below release it, so the two still overlap
+    model_future = None
+    if args.model:
+        executor = ThreadPoolExecutor(max_workers=1)
+        model_future = executor.submit(load_interpreter, args.model)
+        executor.shutdown(wait=False)
+    
+    # Memory-map so large outputs are paged in on demand instead of read up front
+    output = np.load(args.output, mmap_mode='r')
     print(f"Value range: [{output.min():.4f}, {output.max():.4f}]")
     print(f"Mean: {output.mean():.4f}")
     print(f"Std: {output.std():.4f}")
@@ -106,25 +206,30 @@ def main():
         print(f"\nLoaded {len(labels)} labels")
     
     # Inspect model if provided
+    detected_type = None
     if args.model:
         try:
-            import tensorflow as tf
-            interpreter = tf.lite.Interpreter(model_path=args.model)
-            interpreter.allocate_tensors()
+            interpreter = model_future.result()
             
             output_details = interpreter.get_output_details()
             print(f"\n=== Model Output Details ===")
             print(f"Name: {output_details[0]['name']}")
             print(f"Shape: {output_details[0]['shape']}")
             print(f"Type: {output_details[0]['dtype']}")
+            
+            if args.model_type == 'auto':
+                detected_type = detect_model_type(interpreter)
         except ImportError:
-            print("\nNote: Install tensorflow to inspect model details")
+            print("\nNote: Install tflite-runtime or tensorflow to inspect model details")
         except Exception as e:
             print(f"\nWarning: Could not inspect model: {e}")
     
     # Auto-detect model type if needed
     model_type = args.model_type
-    if model_type == 'auto':
+    if model_type == 'auto' and detected_type:
+        model_type = detected_type
+        print(f"\nAuto-detected model type (from model graph): {model_type}")
+    elif model_type == 'auto':
         if output.ndim <= 2 or (output.ndim == 3 and output.shape[0] == 1):
             model_type = 'classification'
         elif output.ndim == 4:
@@ -3,17 +3,71 @@
 Benchmark script to compare GPU vs CPU performance and analyze profiling data
 
 Usage:
-    python benchmark.py model.tflite input.npy --runs 10
+    python benchmark.py model.tflite input.npy --runs 10 --warmup 1
 """
 
 import argparse
+import os
 import subprocess
 import re
-import statistics
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 
-def run_inference(device, model, input_file, use_gpu=True):
+
+# Single pass over the runner output for all timing and op placement lines.
+# Phase names match both the profiling log ("Model Load: 1.00 ms") and the
+# runner's stdout timing profile ("Model load:        1.00").
+TIMING_RE = re.compile(
+    r'(?P<run_phase>Inference|Total)\[(?P<run>\d+)\]:[ \t]+(?P<run_ms>[\d.]+)[ \t]*ms'
+    r'|(?P<phase>(?i:model load|delegate init|inference|total runtime|total)):[ \t]+(?P<ms>[\d.]+)'
+    r'|(?P<ops>GPU|CPU) Operations:[ \t]+(?P<count>\d+)[ \t]+\((?P<percent>[\d.]+)%\)'
+)
+
+PHASE_KEYS = {
+    'model load': 'model_load',
+    'delegate init': 'delegate_init',
+    'inference': 'inference',
+    'total runtime': 'total',
+    'total': 'total',
+}
+
+# Per-run lines printed by the runner for every timed iteration
+RUN_KEYS = {
+    'Inference': 'runs',
+    'Total': 'run_totals',
+}
+
+# Phases reported in the breakdown table, with the timings key holding their samples
+PHASE_TABLE = [
+    ('Model load', 'model_load'),
+    ('Delegate init', 'delegate_init'),
+    ('Inference', 'runs'),
+    ('Total per run', 'run_totals'),
+]
+
+# Lines of runner output kept for error reporting
+OUTPUT_TAIL_LINES = 50
+
+
+def record_timing(timings, match):
+    """Store a single TIMING_RE match into the timings dict"""
+    if match.group('run'):
+        key = RUN_KEYS[match.group('run_phase')]
+        timings.setdefault(key, []).append(float(match.group('run_ms')))
+    elif match.group('phase'):
+        timings[PHASE_KEYS[match.group('phase').lower()]] = float(match.group('ms'))
+    elif match.group('ops') == 'GPU':
+        timings['gpu_ops'] = int(match.group('count'))
+        timings['gpu_percent'] = float(match.group('percent'))
+    else:
+        timings['cpu_ops'] = int(match.group('count'))
+
+
+def run_inference(device, model, input_file, use_gpu=True, iterations=1, warmup=0,
+                  cache_thrash=False, delay_ms=0, output_file="output.npy"):
     """Run inference and extract profiling data"""
     cmd = ["./run_on_device.sh"]
     
@@ -23,126 +77,240 @@ def run_inference(device, model, input_file, use_gpu=True):
     if not use_gpu:
         cmd.append("--no-gpu")
     
-    cmd.extend([model, input_file, "output.npy"])
+    cmd.extend(["--iterations", str(iterations), "--warmup", str(warmup)])
+    if cache_thrash:
+        cmd.append("--cache-thrash")
+    if delay_ms:
+        cmd.extend(["--delay-ms", str(delay_ms)])
+    cmd.extend([model, input_file, output_file])
     
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        output = result.stdout
-        
-        # Parse timing data
+        # Stream the output so parsing overlaps with the run on the device;
+        # only a short tail is kept around for error reporting
         timings = {}
-        for line in output.split('\n'):
-            if 'Model Load:' in line:
-                timings['model_load'] = float(re.search(r'([\d.]+) ms', line).group(1))
-            elif 'Delegate Init:' in line:
-                timings['delegate_init'] = float(re.search(r'([\d.]+) ms', line).group(1))
-            elif 'Inference:' in line and 'Tensor' not in line:
-                timings['inference'] = float(re.search(r'([\d.]+) ms', line).group(1))
-            elif 'Total Runtime:' in line:
-                timings['total'] = float(re.search(r'([\d.]+) ms', line).group(1))
-            elif 'GPU Operations:' in line:
-                match = re.search(r'(\d+) \(([\d.]+)%\)', line)
-                if match:
-                    timings['gpu_ops'] = int(match.group(1))
-                    timings['gpu_percent'] = float(match.group(2))
-            elif 'CPU Operations:' in line:
-                match = re.search(r'(\d+) \(([\d.]+)%\)', line)
+        tail = deque(maxlen=OUTPUT_TAIL_LINES)
+        with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              text=True, bufsize=1) as proc:
+            for line in proc.stdout:
+                tail.append(line)
+                match = TIMING_RE.search(line)
                 if match:
-                    timings['cpu_ops'] = int(match.group(1))
+                    record_timing(timings, match)
+            returncode = proc.wait()
+        
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, cmd, output=''.join(tail))
         
         return timings
     except subprocess.CalledProcessError as e:
         print(f"Error running inference: {e}")
-        print(f"Stdout: {e.stdout}")
-        print(f"Stderr: {e.stderr}")
+        print(f"Output (last {OUTPUT_TAIL_LINES} lines):\n{e.output}")
         return None
 
 
+def ensure_runner_built():
+    """Build the runner once up front, as run_on_device.sh would on first use"""
+    abi = os.environ.get('ANDROID_ABI', 'arm64-v8a')
+    if not os.path.isfile(os.path.join(f"build-{abi}", "tflite_runner")):
+        print("Executable not found. Building first...")
+        subprocess.run(["./build.sh"], check=True)
+
+
+def run_benchmark(args, device, use_gpu=True, cold=False):
+    """Run all timed iterations in one runner process (model/delegate set up once).
+
+    With cold=True the runner evicts caches and/or sleeps between runs as
+    requested by --cache-thrash/--delay-ms.
+    Returns (inference_times, timings); inference_times is empty on failure.
+    """
+    timings = run_inference(device, args.model, args.input, use_gpu=use_gpu,
+                            iterations=args.runs, warmup=args.warmup,
+                            cache_thrash=cold and args.cache_thrash,
+                            delay_ms=args.delay_ms if cold else 0,
+                            output_file="output.npy" if use_gpu else "output_cpu.npy")
+    if not timings or not timings.get('runs'):
+        return [], timings
+    return timings['runs'], timings
+
+
+def run_campaign(args, device, use_gpu=True):
+    """Run the back-to-back and, if requested, cache-cold benchmark for one mode.
+
+    Returns (inference_times, timings, cold_inference_times).
+    """
+    times, timings = run_benchmark(args, device, use_gpu=use_gpu)
+    cold_times = []
+    if times and (args.cache_thrash or args.delay_ms > 0):
+        cold_times, _ = run_benchmark(args, device, use_gpu=use_gpu, cold=True)
+    return times, timings, cold_times
+
+
+def print_runs(title, times, runs):
+    """Print the per-run inference times of one benchmark campaign"""
+    print(f"\n{title}:")
+    if not times:
+        print("  FAILED")
+        return
+    for i, inference_ms in enumerate(times, 1):
+        print(f"  Run {i}/{runs}: {inference_ms:.2f} ms")
+
+
+def summarize(times):
+    """Compute mean/median/stdev/min/max/p95/p99 of a list of timings with NumPy"""
+    arr = np.asarray(times, dtype=np.float64)
+    median, p95, p99 = np.percentile(arr, [50, 95, 99])
+    return {
+        'count': arr.size,
+        'mean': arr.mean(),
+        'median': median,
+        'stdev': arr.std(ddof=1) if arr.size > 1 else 0.0,
+        'min': arr.min(),
+        'max': arr.max(),
+        'p95': p95,
+        'p99': p99,
+    }
+
+
+def print_summary(summary):
+    """Print the statistics computed by summarize()"""
+    print(f"  Mean:     {summary['mean']:.2f} ms")
+    print(f"  Median:   {summary['median']:.2f} ms")
+    print(f"  Std Dev:  {summary['stdev']:.2f} ms")
+    print(f"  Min:      {summary['min']:.2f} ms")
+    print(f"  Max:      {summary['max']:.2f} ms")
+
+
+def phase_samples(timings):
+    """Collect the samples of every phase in PHASE_TABLE from one campaign's timings"""
+    samples = {}
+    for _, key in PHASE_TABLE:
+        value = timings.get(key) if timings else None
+        if value is not None:
+            samples[key] = value if isinstance(value, list) else [value]
+    return samples
+
+
+def print_phase_table(samples):
+    """Print a phase x statistic table; load/init happen once per runner process"""
+    print(f"  {'Phase (ms)':<15}{'N':>5}{'Mean':>10}{'Min':>10}{'Median':>10}{'P95':>10}{'P99':>10}")
+    for title, key in PHASE_TABLE:
+        if key not in samples:
+            continue
+        summary = summarize(samples[key])
+        print(f"  {title:<15}{summary['count']:>5}{summary['mean']:>10.2f}{summary['min']:>10.2f}"
+              f"{summary['median']:>10.2f}{summary['p95']:>10.2f}{summary['p99']:>10.2f}")
+
+
 def main():
     parser = argparse.ArgumentParser(description='Benchmark TFLite model performance')
     parser.add_argument('model', help='Path to .tflite model')
     parser.add_argument('input', help='Path to input .npy file')
     parser.add_argument('--runs', '-r', type=int, default=10,
-                       help='Number of benchmark runs (default: 10)')
+                       help='Number of timed inference runs (default: 10)')
+    parser.add_argument('--warmup', '-w', type=int, default=1,
+                       help='Untimed warm-up runs before timing (default: 1)')
     parser.add_argument('--device', '-d', help='Target device serial number')
     parser.add_argument('--compare-cpu', action='store_true',
                        help='Also benchmark CPU-only mode')
+    parser.add_argument('--cpu-device',
+                       help='Device serial for the CPU-only benchmark (default: same as --device); '
+                            'with --device set to a different serial both benchmarks run in parallel')
+    parser.add_argument('--sequential', action='store_true',
+                       help='Never run the GPU and CPU benchmarks in parallel')
+    parser.add_argument('--cache-thrash', action='store_true',
+                       help='Also measure cache-cold runs (caches evicted before every run)')
+    parser.add_argument('--delay-ms', type=int, default=0,
+                       help='Sleep between cache-cold runs to simulate request arrival (default: 0)')
     
     args = parser.parse_args()
+    measure_cold = args.cache_thrash or args.delay_ms > 0
+    cpu_device = args.cpu_device or args.device
+    # Both campaigns deploy into the same directory on the target, so they can
+    # only overlap when both serials are explicit and different (an unset
+    # --device means adb's default, which may well be the CPU device)
+    parallel = (args.compare_cpu and not args.sequential and args.device is not None
+                and args.cpu_device is not None and args.cpu_device != args.device)
     
     print("=" * 60)
     print("TensorFlow Lite Performance Benchmark")
     print("=" * 60)
     print(f"Model: {args.model}")
     print(f"Input: {args.input}")
-    print(f"Runs: {args.runs}")
+    print(f"Runs: {args.runs} (warm-up: {args.warmup})")
     if args.device:
         print(f"Device: {args.device}")
+    if args.compare_cpu and cpu_device != args.device:
+        print(f"CPU device: {cpu_device}")
+    if measure_cold:
+        print(f"Cache-cold runs: thrash={'on' if args.cache_thrash else 'off'}, "
+              f"delay={args.delay_ms} ms")
     print()
     
-    # GPU benchmark
-    print("Running GPU benchmark...")
-    gpu_times = []
-    gpu_stats = None
-    
-    for i in range(args.runs):
-        print(f"  Run {i+1}/{args.runs}...", end='', flush=True)
-        timings = run_inference(args.device, args.model, args.input, use_gpu=True)
-        if timings:
-            gpu_times.append(timings['inference'])
-            if gpu_stats is None:
-                gpu_stats = timings
-            print(f" {timings['inference']:.2f} ms")
-        else:
-            print(" FAILED")
-            sys.exit(1)
-    
-    # CPU benchmark if requested
     cpu_times = []
+    cpu_cold_times = []
     cpu_stats = None
     
+    if parallel:
+        # Avoid both run_on_device.sh invocations starting ./build.sh at once
+        ensure_runner_built()
+        print("Running GPU and CPU benchmarks in parallel...")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            gpu_future = executor.submit(run_campaign, args, args.device, True)
+            cpu_future = executor.submit(run_campaign, args, cpu_device, False)
+            gpu_times, gpu_stats, gpu_cold_times = gpu_future.result()
+            cpu_times, cpu_stats, cpu_cold_times = cpu_future.result()
+    else:
+        print("Running GPU benchmark...")
+        gpu_times, gpu_stats, gpu_cold_times = run_campaign(args, args.device, True)
+        if gpu_times and args.compare_cpu:
+            print("Running CPU benchmark...")
+            cpu_times, cpu_stats, cpu_cold_times = run_campaign(args, cpu_device, False)
+    
+    print_runs("GPU runs", gpu_times, args.runs)
+    if not gpu_times:
+        sys.exit(1)
+    if measure_cold:
+        print_runs("GPU runs (cache-cold)", gpu_cold_times, args.runs)
     if args.compare_cpu:
-        print("\nRunning CPU benchmark...")
-        for i in range(args.runs):
-            print(f"  Run {i+1}/{args.runs}...", end='', flush=True)
-            timings = run_inference(args.device, args.model, args.input, use_gpu=False)
-            if timings:
-                cpu_times.append(timings['inference'])
-                if cpu_stats is None:
-                    cpu_stats = timings
-                print(f" {timings['inference']:.2f} ms")
-            else:
-                print(" FAILED")
+        print_runs("CPU runs", cpu_times, args.runs)
+        if cpu_times and measure_cold:
+            print_runs("CPU runs (cache-cold)", cpu_cold_times, args.runs)
     
     # Print results
     print("\n" + "=" * 60)
     print("BENCHMARK RESULTS")
     print("=" * 60)
     
+    gpu_summary = summarize(gpu_times)
     print("\nGPU Mode:")
-    print(f"  Mean:     {statistics.mean(gpu_times):.2f} ms")
-    print(f"  Median:   {statistics.median(gpu_times):.2f} ms")
-    print(f"  Std Dev:  {statistics.stdev(gpu_times):.2f} ms")
-    print(f"  Min:      {min(gpu_times):.2f} ms")
-    print(f"  Max:      {max(gpu_times):.2f} ms")
+    print_summary(gpu_summary)
+    print()
+    print_phase_table(phase_samples(gpu_stats))
     
     if gpu_stats and 'gpu_ops' in gpu_stats:
         print(f"\n  GPU Operations: {gpu_stats['gpu_ops']} ({gpu_stats['gpu_percent']:.1f}%)")
         print(f"  CPU Operations: {gpu_stats['cpu_ops']}")
     
+    if gpu_cold_times:
+        print("\nGPU Mode (cache-cold):")
+        print_summary(summarize(gpu_cold_times))
+    
     if cpu_times:
+        cpu_summary = summarize(cpu_times)
         print("\nCPU Mode:")
-        print(f"  Mean:     {statistics.mean(cpu_times):.2f} ms")
-        print(f"  Median:   {statistics.median(cpu_times):.2f} ms")
-        print(f"  Std Dev:  {statistics.stdev(cpu_times):.2f} ms")
-        print(f"  Min:      {min(cpu_times):.2f} ms")
-        print(f"  Max:      {max(cpu_times):.2f} ms")
+        print_summary(cpu_summary)
+        print()
+        print_phase_table(phase_samples(cpu_stats))
         
-        speedup = statistics.mean(cpu_times) / statistics.mean(gpu_times)
+        speedup = cpu_summary['mean'] / gpu_summary['mean']
         print(f"\n  GPU Speedup: {speedup:.2f}x faster than CPU")
+        
+        if cpu_cold_times:
+            print("\nCPU Mode (cache-cold):")
+            print_summary(summarize(cpu_cold_times))
     
     # Performance classification
-    mean_gpu = statistics.mean(gpu_times)
+    mean_gpu = gpu_summary['mean']
     print("\nPerformance Classification:")
     if mean_gpu < 10:
         print("  ✓ Excellent - Suitable for real-time applications")
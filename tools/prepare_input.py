@@ -7,6 +7,7 @@ Usage:
 """
 
 import argparse
+import os
 import numpy as np
 from PIL import Image
 
@@ -14,35 +15,79 @@ from PIL import Image
 def load_image(image_path, target_size):
     """Load and resize image"""
     img = Image.open(image_path)
+    # Let the JPEG decoder downscale via DCT while decoding (no-op for other formats);
+    # keep 2x headroom so the final resize still has detail to filter
+    img.draft('RGB', (target_size * 2, target_size * 2))
     if img.mode != 'RGB':
         img = img.convert('RGB')
-    img = img.resize((target_size, target_size))
-    return np.array(img)
+    img = img.resize((target_size, target_size), Image.BILINEAR)
+    return np.asarray(img)
 
 
-def normalize_input(image_array, method='imagenet'):
-    """Normalize image according to different methods"""
-    image_array = image_array.astype(np.float32)
-    
+def normalization_params(method='imagenet'):
+    """Per-channel float32 (scale, offset) such that x_norm = x * scale + offset"""
     if method == 'imagenet':
         # ImageNet normalization: mean=[123.68, 116.78, 103.94], std=[58.393, 57.12, 57.375]
-        mean = np.array([123.68, 116.78, 103.94])
-        std = np.array([58.393, 57.12, 57.375])
-        image_array = (image_array - mean) / std
+        mean = np.array([123.68, 116.78, 103.94], dtype=np.float32)
+        std = np.array([58.393, 57.12, 57.375], dtype=np.float32)
+        # (x - mean) / std == x * (1 / std) + (-mean / std)
+        return 1.0 / std, -mean / std
     elif method == 'mobilenet':
         # MobileNet normalization: [0, 255] -> [-1, 1]
-        image_array = (image_array / 127.5) - 1.0
+        return np.full(3, 1.0 / 127.5, dtype=np.float32), np.full(3, -1.0, dtype=np.float32)
     elif method == 'inception':
         # Inception normalization: [0, 255] -> [-1, 1]
-        image_array = (image_array / 127.5) - 1.0
+        return np.full(3, 1.0 / 127.5, dtype=np.float32), np.full(3, -1.0, dtype=np.float32)
     elif method == 'zero_one':
         # Simple [0, 255] -> [0, 1]
-        image_array = image_array / 255.0
+        return np.full(3, 1.0 / 255.0, dtype=np.float32), np.zeros(3, dtype=np.float32)
     elif method == 'none':
         # No normalization
-        pass
+        return None
     else:
         raise ValueError(f"Unknown normalization method: {method}")
+
+
+def normalize_input(image_array, method='imagenet'):
+    """Normalize image according to different methods"""
+    params = normalization_params(method)
+    # Single float32 copy, then scale/shift in place (no float64 upcast or temporaries)
+    image_array = image_array.astype(np.float32)
+    
+    if params is not None:
+        scale, offset = params
+        np.multiply(image_array, scale, out=image_array)
+        image_array += offset
+    
+    return image_array
+
+
+def prepare_nchw(image_array, method='imagenet'):
+    """Normalize an HWC uint8 image straight into a contiguous 1xCxHxW float32 array"""
+    params = normalization_params(method)
+    height, width, channels = image_array.shape
+    output = np.empty((1, channels, height, width), dtype=np.float32)
+    
+    # One channel plane at a time: each write is a contiguous H*W float32 stream
+    for c in range(channels):
+        if params is None:
+            output[0, c] = image_array[:, :, c]
+        else:
+            scale, offset = params
+            np.multiply(image_array[:, :, c], scale[c], out=output[0, c])
+            output[0, c] += offset[c]
+    
+    return output
+
+
+def add_batch_dim(image_array, channels_first=False):
+    """Add the batch dimension, optionally converting to contiguous NCHW"""
+    image_array = np.expand_dims(image_array, axis=0)
+    
+    if channels_first:
+        print("Converting to NCHW format")
+        # Materialise the NCHW layout once; np.save would otherwise copy the strided view
+        image_array = np.ascontiguousarray(np.transpose(image_array, (0, 3, 1, 2)))
     
     return image_array
 
@@ -52,9 +97,9 @@ def main():
     parser.add_argument('image', help='Input image path')
     parser.add_argument('--output', '-o', default='input.npy', help='Output NPY file path')
     parser.add_argument('--size', '-s', type=int, default=224, help='Target image size (default: 224)')
-    parser.add_argument('--normalize', '-n', default='mobilenet',
+    parser.add_argument('--normalize', '-n',
                        choices=['imagenet', 'mobilenet', 'inception', 'zero_one', 'none'],
-                       help='Normalization method')
+                       help='Normalization method (default: mobilenet)')
     parser.add_argument('--quantize', '-q', action='store_true',
                        help='Output as uint8 (quantized) instead of float32')
     parser.add_argument('--channels-first', action='store_true',
@@ -62,32 +107,42 @@ def main():
     
     args = parser.parse_args()
     
+    # Validate before decoding the image
+    if not os.path.isfile(args.image):
+        parser.error(f"image not found: {args.image}")
+    if args.quantize and args.normalize not in (None, 'none'):
+        parser.error(f"--quantize outputs raw uint8 pixels and cannot be combined with "
+                     f"--normalize {args.normalize}")
+    if args.normalize is None:
+        args.normalize = 'mobilenet'
+    
     print(f"Loading image: {args.image}")
     image_array = load_image(args.image, args.size)
     print(f"Image shape: {image_array.shape}")
     
-    if not args.quantize:
-        print(f"Normalizing with method: {args.normalize}")
-        image_array = normalize_input(image_array, args.normalize)
-    else:
+    if args.quantize:
+        # uint8 fast path: never touches float32, 4x less data than the float path
         print("Using uint8 quantization (no normalization)")
-    
-    # Add batch dimension
-    image_array = np.expand_dims(image_array, axis=0)
-    
-    # Convert to channels-first if requested
-    if args.channels_first:
-        print("Converting to NCHW format")
-        image_array = np.transpose(image_array, (0, 3, 1, 2))
+        image_array = add_batch_dim(image_array, args.channels_first)
+        assert image_array.dtype == np.uint8
+        value_range = f"[{image_array.min()}, {image_array.max()}]"
+    else:
+        print(f"Normalizing with method: {args.normalize}")
+        if args.channels_first:
+            print("Converting to NCHW format")
+            image_array = prepare_nchw(image_array, args.normalize)
+        else:
+            image_array = add_batch_dim(normalize_input(image_array, args.normalize))
+        value_range = f"[{image_array.min():.4f}, {image_array.max():.4f}]"
     
     print(f"Final shape: {image_array.shape}")
     print(f"Data type: {image_array.dtype}")
-    print(f"Value range: [{image_array.min():.4f}, {image_array.max():.4f}]")
+    print(f"Value range: {value_range}")
     
     # Save to NPY
     np.save(args.output, image_array)
     print(f"\nSaved to: {args.output}")
-    print(f"File size: {np.load(args.output).nbytes / 1024:.2f} KB")
+    print(f"File size: {os.path.getsize(args.output) / 1024:.2f} KB")
 
 
 if __name__ == '__main__':